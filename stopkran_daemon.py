@@ -11,12 +11,19 @@ import asyncio
 import json
 import logging
 import os
+import re
+import socket
 import stat
 import sys
-from datetime import datetime, timezone
+from collections import OrderedDict
+from collections.abc import Callable
+from contextlib import suppress
+from dataclasses import dataclass, field
 from pathlib import Path
+from time import gmtime
 
-from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
+import orjson
+from telegram import Update
 from telegram.ext import (
     Application,
     CallbackQueryHandler,
@@ -33,6 +40,10 @@ from telegram.ext import (
 CONFIG_PATH = Path.home() / ".config" / "stopkran" / "config.json"
 SOCKET_PATH = "/tmp/stopkran.sock"
 DEFAULT_TIMEOUT = 300  # seconds before auto-deny
+DEFAULT_MAX_INFLIGHT = 32  # requests being sent to Telegram at once; the rest wait
+MAX_REQUEST_SIZE = 1 << 20  # bytes; larger hook payloads are rejected
+SOCKET_BACKLOG = 512  # pending connections queued during a burst of hook calls
+SOCKET_BUFFER_SIZE = 256 * 1024  # bytes; set on each accepted connection
 PAUSED_FLAG = CONFIG_PATH.parent / "paused"
 
 logging.basicConfig(
@@ -51,16 +62,51 @@ def load_config() -> dict:
 
 
 def save_config(cfg: dict):
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(cfg, f, indent=4)
+    # Write a private temp file and rename it over the config, so a crash
+    # mid-write never leaves a truncated config behind. Resolve first so a
+    # symlinked config keeps its link.
+    target = CONFIG_PATH.resolve()
+    tmp = target.with_name(target.name + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    os.fchmod(fd, 0o600)  # in case a leftover temp file had other permissions
+    with open(fd, "wb") as f:
+        f.write(orjson.dumps(cfg, option=orjson.OPT_INDENT_2))
+    os.replace(tmp, target)
+
+
+# Owner's chat id — mirrors cfg["chat_id"], set at startup and on /start
+OWNER_CHAT_ID: int | None = None
+
+# Lets only the owner's updates reach the owner-only handlers; empty until
+# an owner is known, in which case nothing passes
+owner_filter = filters.Chat(allow_empty=False)
 
 
 # ---------------------------------------------------------------------------
 # Pending-request registry
 # ---------------------------------------------------------------------------
 
-# request_id -> {event: asyncio.Event, decision: str|None, tg_message_id: int|None}
-pending: dict[str, dict] = {}
+@dataclass(slots=True)
+class PendingEntry:
+    """A permission request waiting for the owner's decision."""
+    fut: asyncio.Future  # resolves to "allow" or "deny"
+    tg_message_text: str
+    tool_name: str
+    tg_message_id: int | None = None
+    # AskUserQuestion: options and text of the first (answerable) question
+    options: list[dict] = field(default_factory=list)
+    question_text: str = ""
+    answer: dict | None = None  # updatedInput for the hook
+    permission_suggestions: list = field(default_factory=list)
+    always_allow: bool = False
+
+
+pending: dict[str, PendingEntry] = {}
+# request_ids still awaiting a decision, oldest first
+undecided: OrderedDict[str, None] = OrderedDict()
+
+# Strong references to fire-and-forget tasks (the event loop keeps only weak ones)
+background_tasks: set[asyncio.Task] = set()
 
 
 # ---------------------------------------------------------------------------
@@ -69,18 +115,21 @@ pending: dict[str, dict] = {}
 
 async def cmd_start(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     """Register the first user as the owner."""
+    global OWNER_CHAT_ID
     cfg = ctx.bot_data["config"]
     chat_id = update.effective_chat.id
 
-    if cfg.get("chat_id") is None:
+    if OWNER_CHAT_ID is None:
         cfg["chat_id"] = chat_id
         save_config(cfg)
+        OWNER_CHAT_ID = chat_id
+        owner_filter.add_chat_ids(chat_id)
         await update.message.reply_text(
             f"✅ Registered! Chat ID: {chat_id}\n"
             "You will now receive permission requests here."
         )
         log.info("Owner registered: chat_id=%s", chat_id)
-    elif cfg["chat_id"] == chat_id:
+    elif OWNER_CHAT_ID == chat_id:
         await update.message.reply_text("You are already registered as the owner.")
     else:
         await update.message.reply_text("⛔ Another owner is already registered.")
@@ -88,10 +137,6 @@ async def cmd_start(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_status(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     """Show pause state and the number of pending requests."""
-    cfg = ctx.bot_data["config"]
-    if update.effective_chat.id != cfg.get("chat_id"):
-        return
-
     paused = PAUSED_FLAG.exists()
     mode = "⏸ Paused" if paused else "▶️ Active"
 
@@ -106,10 +151,6 @@ async def cmd_status(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_pause(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     """Pause — stop forwarding requests to Telegram."""
-    cfg = ctx.bot_data["config"]
-    if update.effective_chat.id != cfg.get("chat_id"):
-        return
-
     PAUSED_FLAG.parent.mkdir(parents=True, exist_ok=True)
     PAUSED_FLAG.touch()
     await update.message.reply_text("⏸ Paused — запросы идут через нативный UI")
@@ -117,83 +158,123 @@ async def cmd_pause(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 async def cmd_resume(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     """Resume — start forwarding requests to Telegram again."""
-    cfg = ctx.bot_data["config"]
-    if update.effective_chat.id != cfg.get("chat_id"):
-        return
-
     PAUSED_FLAG.unlink(missing_ok=True)
     await update.message.reply_text("▶️ Resumed — запросы идут в Telegram")
 
 
-async def resolve_request(request_id: str, action: str, app: Application):
-    """Resolve a pending request and update its Telegram message."""
+def edit_message_later(app: Application, chat_id: int, message_id: int, text: str):
+    """Replace a request message's text and buttons without blocking the caller."""
+    async def _edit():
+        try:
+            # Editing the text without a markup also drops the buttons
+            await app.bot.edit_message_text(
+                chat_id=chat_id, message_id=message_id,
+                text=text, reply_markup=None,
+            )
+        except Exception:
+            pass
+
+    task = asyncio.create_task(_edit())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+
+
+# action -> (emoji, label)
+DECISION_MARKS = {"allow": ("✅", "Allowed"), "deny": ("❌", "Denied")}
+
+
+def claim_request(
+    request_id: str,
+    action: str,
+    answer: dict | None = None,
+    always_allow: bool = False,
+) -> PendingEntry | None:
+    """Record a decision unless the request is gone or already decided.
+
+    Never awaits, so a button press and a text reply racing for the same
+    request cannot both win or overwrite each other's answer.
+    """
     entry = pending.get(request_id)
+    if entry is None or entry.fut.done():
+        return None
+
+    if answer is not None:
+        entry.answer = answer
+    if always_allow:
+        entry.always_allow = True
+    entry.fut.set_result(action)
+    undecided.pop(request_id, None)
+    return entry
+
+
+async def resolve_request(
+    request_id: str,
+    action: str,
+    app: Application,
+    answer: dict | None = None,
+    always_allow: bool = False,
+):
+    """Resolve a pending request and update its Telegram message."""
+    entry = claim_request(request_id, action, answer, always_allow)
     if entry is None:
         return False
 
-    entry["decision"] = action
-    entry["event"].set()
-
-    now = datetime.now(timezone.utc).strftime("%H:%M")
-    emoji = "✅" if action == "allow" else "❌"
+    t = gmtime()
+    now = f"{t.tm_hour:02d}:{t.tm_min:02d}"  # UTC
+    emoji, label = DECISION_MARKS[action]
 
     # For AskUserQuestion, show the selected answer
-    answer_data = entry.get("answer")
+    answer_data = entry.answer
     if answer_data and action == "allow":
         answers = answer_data.get("answers", {})
         selected_label = next(iter(answers.values()), None) if answers else None
-        label = f"Ответ: {selected_label}" if selected_label else "Allowed"
-    elif entry.get("always_allow") and action == "allow":
+        if selected_label:
+            label = f"Ответ: {selected_label}"
+    elif entry.always_allow and action == "allow":
         label = "Always Allowed"
-    else:
-        label = "Allowed" if action == "allow" else "Denied"
 
-    cfg = app.bot_data["config"]
-    chat_id = cfg.get("chat_id")
-    msg_id = entry.get("tg_message_id")
+    chat_id = OWNER_CHAT_ID
+    msg_id = entry.tg_message_id
     if chat_id and msg_id:
-        try:
-            orig = entry.get("tg_message_text", "")
-            await app.bot.edit_message_reply_markup(
-                chat_id=chat_id, message_id=msg_id, reply_markup=None,
-            )
-            await app.bot.edit_message_text(
-                chat_id=chat_id, message_id=msg_id,
-                text=orig + f"\n\n→ {emoji} {label} at {now}",
-            )
-        except Exception:
-            pass
+        orig = entry.tg_message_text
+        edit_message_later(
+            app, chat_id, msg_id, orig + f"\n\n→ {emoji} {label} at {now}",
+        )
     return True
 
 
 def get_oldest_pending_request_id() -> str | None:
     """Return the request_id of the oldest pending (undecided) request."""
-    for rid, entry in pending.items():
-        if entry["decision"] is None:
-            return rid
-    return None
+    return next(iter(undecided), None)
 
 
 # Text patterns for Apple Watch / quick replies
-ALLOW_PATTERNS = {"да", "yes", "ок", "ok", "👍", "👍🏻", "👍🏼", "👍🏽", "👍🏾", "👍🏿", "✅"}
-DENY_PATTERNS = {"нет", "no", "👎", "👎🏻", "👎🏼", "👎🏽", "👎🏾", "👎🏿", "❌"}
+ALLOW_PATTERNS = frozenset({"да", "yes", "ок", "ok", "👍", "👍🏻", "👍🏼", "👍🏽", "👍🏾", "👍🏿", "✅"})
+DENY_PATTERNS = frozenset({"нет", "no", "👎", "👎🏻", "👎🏼", "👎🏽", "👎🏾", "👎🏿", "❌"})
+
+# casefolded word -> action
+QUICK_REPLIES = (
+    {w.casefold(): "allow" for w in ALLOW_PATTERNS}
+    | {w.casefold(): "deny" for w in DENY_PATTERNS}
+)
+
+# Longest first, so a bare emoji never shadows its skin-tone variant
+_words = "|".join(re.escape(w) for w in sorted(QUICK_REPLIES, key=len, reverse=True))
+# Groups: (option number) | (quick-reply word). Anchored at both ends because
+# filters.Regex matches with search()
+QUICK_REPLY_RE = re.compile(rf"^\s*(?:(\d+)|({_words}))\s*\Z", re.IGNORECASE)
 
 
 async def callback_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     """Handle Allow / Deny button presses."""
     query = update.callback_query
-    cfg = ctx.bot_data["config"]
 
     # Only the owner can respond
-    if query.from_user.id != cfg.get("chat_id"):
+    if query.from_user.id != OWNER_CHAT_ID:
         await query.answer("⛔ Not authorized", show_alert=True)
         return
 
     data = query.data  # "allow:<id>", "deny:<id>", or "ans:<id>:<index>"
-    if ":" not in data:
-        await query.answer("Invalid callback")
-        return
-
     parts = data.split(":", 2)
     action = parts[0]
 
@@ -211,22 +292,16 @@ async def callback_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
             await query.answer("Request expired or already handled")
             return
 
-        questions = entry.get("questions") or []
-        if not questions:
-            await query.answer("No questions data")
-            return
-
-        options = questions[0].get("options", [])
-        if option_idx < 0 or option_idx >= len(options):
+        options = entry.options
+        if not 0 <= option_idx < len(options):
             await query.answer("Invalid option index")
             return
 
         selected = options[option_idx]
-        question_text = questions[0].get("question", "")
         # Build the answers dict: {question_text: selected_label}
-        entry["answer"] = {"answers": {question_text: selected["label"]}}
+        answer = {"answers": {entry.question_text: selected["label"]}}
 
-        ok = await resolve_request(request_id, "allow", ctx.application)
+        ok = await resolve_request(request_id, "allow", ctx.application, answer=answer)
         if ok:
             await query.answer(f"✅ {selected['label']}")
         else:
@@ -236,10 +311,9 @@ async def callback_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     if action == "alwys" and len(parts) >= 2:
         # Always Allow: resolve as allow + flag for updatedPermissions
         request_id = parts[1]
-        entry = pending.get(request_id)
-        if entry is not None:
-            entry["always_allow"] = True
-        ok = await resolve_request(request_id, "allow", ctx.application)
+        ok = await resolve_request(
+            request_id, "allow", ctx.application, always_allow=True,
+        )
         if ok:
             await query.answer("✅ Always Allowed")
         else:
@@ -252,8 +326,7 @@ async def callback_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
     request_id = parts[1]
     ok = await resolve_request(request_id, action, ctx.application)
-    emoji = "✅" if action == "allow" else "❌"
-    label = "Allowed" if action == "allow" else "Denied"
+    emoji, label = DECISION_MARKS[action]
 
     if ok:
         await query.answer(f"{emoji} {label}")
@@ -267,39 +340,32 @@ async def callback_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
 async def text_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
     """Handle text messages (Apple Watch / quick replies)."""
-    cfg = ctx.bot_data["config"]
-    if update.effective_chat.id != cfg.get("chat_id"):
-        return
-
-    text = (update.message.text or "").strip().lower()
+    # Only messages matching QUICK_REPLY_RE reach this handler
+    digits, word = ctx.matches[0].groups()
 
     request_id = get_oldest_pending_request_id()
 
     # Handle digit replies for AskUserQuestion
-    if text.isdigit() and request_id:
+    if digits and request_id:
         entry = pending.get(request_id)
-        if entry and entry.get("tool_name") == "AskUserQuestion":
-            option_idx = int(text) - 1  # 1-based to 0-based
-            questions = entry.get("questions") or []
-            if questions:
-                options = questions[0].get("options", [])
-                if 0 <= option_idx < len(options):
-                    selected = options[option_idx]
-                    question_text = questions[0].get("question", "")
-                    entry["answer"] = {"answers": {question_text: selected["label"]}}
-                    ok = await resolve_request(request_id, "allow", ctx.application)
-                    if ok:
-                        await update.message.reply_text(f"✅ {selected['label']}")
-                    else:
-                        await update.message.reply_text("Request already handled.")
-                    return
-
-    if text in ALLOW_PATTERNS:
-        action = "allow"
-    elif text in DENY_PATTERNS:
-        action = "deny"
-    else:
+        if entry and entry.tool_name == "AskUserQuestion":
+            option_idx = int(digits) - 1  # 1-based to 0-based
+            options = entry.options
+            if 0 <= option_idx < len(options):
+                selected = options[option_idx]
+                answer = {"answers": {entry.question_text: selected["label"]}}
+                ok = await resolve_request(
+                    request_id, "allow", ctx.application, answer=answer,
+                )
+                if ok:
+                    await update.message.reply_text(f"✅ {selected['label']}")
+                else:
+                    await update.message.reply_text("Request already handled.")
+                return
+
+    if word is None:
         return
+    action = QUICK_REPLIES[word.casefold()]
 
     if request_id is None:
         await update.message.reply_text("No pending requests.")
@@ -307,7 +373,7 @@ async def text_handler(update: Update, ctx: ContextTypes.DEFAULT_TYPE):
 
     ok = await resolve_request(request_id, action, ctx.application)
     if ok:
-        emoji = "✅" if action == "allow" else "❌"
+        emoji, _ = DECISION_MARKS[action]
         await update.message.reply_text(f"{emoji} Done")
     else:
         await update.message.reply_text("Request already handled.")
@@ -323,24 +389,54 @@ def format_ask_message(req: dict) -> tuple[str, list[dict]]:
     questions = tool_input.get("questions", [])
     session = req.get("session_id", "")[:8]
 
-    lines = ["❓ Вопрос от Claude", ""]
+    parts = ["❓ Вопрос от Claude"]
 
     for q in questions:
-        lines.append(q.get("question", ""))
-        lines.append("")
+        parts += ["", q.get("question", ""), ""]
         for i, opt in enumerate(q.get("options", []), 1):
             label = opt.get("label", "")
             desc = opt.get("description", "")
             if desc:
-                lines.append(f"{i}. {label} — {desc}")
+                parts.append(f"{i}. {label} — {desc}")
             else:
-                lines.append(f"{i}. {label}")
-        lines.append("")
+                parts.append(f"{i}. {label}")
 
     if session:
-        lines.append(f"Session: {session}")
+        parts += ["", f"Session: {session}"]
+
+    return "\n".join(parts), questions
+
+
+def truncated_json(obj, limit: int = 300) -> str:
+    """Serialize obj to JSON and return at most `limit` characters."""
+    # Decode only the prefix that can hold `limit` chars (≤ 4 UTF-8 bytes each)
+    raw = orjson.dumps(obj)[:limit * 4]
+    return raw.decode("utf-8", "ignore")[:limit]
+
+
+def bash_snippet(tool_input: dict) -> str:
+    return tool_input.get("command", "")
+
+
+def edit_snippet(tool_input: dict) -> str:
+    fp = tool_input.get("file_path", "")
+    old = (tool_input.get("old_string") or "")[:120]
+    new = (tool_input.get("new_string") or "")[:120]
+    return f"{fp}\n-  {old}\n+  {new}"
 
-    return "\n".join(lines).strip(), questions
+
+def write_snippet(tool_input: dict) -> str:
+    fp = tool_input.get("file_path", "")
+    content_preview = (tool_input.get("content") or "")[:200]
+    return f"{fp}\n{content_preview}"
+
+
+# tool_name -> human-readable snippet of its input; other tools get raw JSON
+SNIPPET_FORMATTERS: dict[str, Callable[[dict], str]] = {
+    "Bash": bash_snippet,
+    "Edit": edit_snippet,
+    "Write": write_snippet,
+}
 
 
 def format_request_message(req: dict) -> str:
@@ -349,176 +445,181 @@ def format_request_message(req: dict) -> str:
     session = req.get("session_id", "")[:8]
     tool_input = req.get("tool_input", {})
 
-    # Build a human-readable snippet of the tool input
-    if tool == "Bash":
-        snippet = tool_input.get("command", "")
-    elif tool == "Edit":
-        fp = tool_input.get("file_path", "")
-        old = (tool_input.get("old_string", "") or "")[:120]
-        new = (tool_input.get("new_string", "") or "")[:120]
-        snippet = f"{fp}\n-  {old}\n+  {new}"
-    elif tool == "Write":
-        fp = tool_input.get("file_path", "")
-        content_preview = (tool_input.get("content", "") or "")[:200]
-        snippet = f"{fp}\n{content_preview}"
-    else:
-        snippet = json.dumps(tool_input, ensure_ascii=False)[:300]
-
-    lines = [
-        "🔐 Permission Request",
-        "",
-        f"📂 {cwd}" if cwd else "",
-        f"🔧 {tool}",
-        "",
-        snippet,
-    ]
+    snippet = SNIPPET_FORMATTERS.get(tool, truncated_json)(tool_input)
+
+    parts = ["🔐 Permission Request", ""]
+    if cwd:
+        parts.append(f"📂 {cwd}")
+    parts += [f"🔧 {tool}", "", snippet]
     if session:
-        lines += ["", f"Session: {session}"]
+        parts += ["", f"Session: {session}"]
+
+    return "\n".join(parts)
+
 
-    return "\n".join(l for l in lines if l is not None)
+# Inline button labels
+ALLOW_LABEL = "✅ Allow"
+DENY_LABEL = "❌ Deny"
+ALWAYS_ALLOW_LABEL = "✅ Always Allow"
+
+# Inline keyboards are sent as plain Bot API dicts, skipping the
+# InlineKeyboardMarkup/InlineKeyboardButton objects PTB would serialize anyway
 
 
 # ---------------------------------------------------------------------------
 # Unix socket server — IPC with stopkran_hook.py
 # ---------------------------------------------------------------------------
 
+# Wire format (both directions): 4-byte big-endian length + JSON body
+
+def write_frame(writer: asyncio.StreamWriter, body: bytes):
+    """Write a message body prefixed with its length."""
+    writer.writelines((len(body).to_bytes(4, "big"), body))
+
+
+# Response bodies for decisions without extra fields, serialized once
+ALLOW_RESPONSE = orjson.dumps({"decision": "allow"})
+DENY_RESPONSE = orjson.dumps({"decision": "deny"})
+
+
 async def handle_hook_connection(
     reader: asyncio.StreamReader,
     writer: asyncio.StreamWriter,
     app: Application,
     timeout: int,
+    send_slots: asyncio.Semaphore,
 ):
     """Handle a single connection from stopkran_hook.py."""
     try:
-        line = await asyncio.wait_for(reader.readline(), timeout=10)
-        if not line:
-            return
-
-        req = json.loads(line.decode("utf-8"))
+        async with asyncio.timeout(10):
+            try:
+                header = await reader.readexactly(4)
+            except asyncio.IncompleteReadError:
+                return
+            size = int.from_bytes(header, "big")
+            if size > MAX_REQUEST_SIZE:
+                raise ValueError(f"request too large ({size} bytes)")
+            body = await reader.readexactly(size)
+
+        req = orjson.loads(body)
         request_id = req["request_id"]
         log.info("Received request %s for tool=%s", request_id, req.get("tool_name"))
 
-        cfg = app.bot_data["config"]
-        chat_id = cfg.get("chat_id")
+        chat_id = OWNER_CHAT_ID
 
         if chat_id is None:
             log.warning("No owner registered — auto-denying request %s", request_id)
-            response = json.dumps({"decision": "deny"}) + "\n"
-            writer.write(response.encode("utf-8"))
+            write_frame(writer, DENY_RESPONSE)
             await writer.drain()
             return
 
         # Register the pending request
-        event = asyncio.Event()
+        fut = asyncio.get_running_loop().create_future()
         tool_name = req.get("tool_name", "")
         is_ask = tool_name == "AskUserQuestion"
-        questions = None
+        # Only the first question is answerable; keep its options at hand
+        options = []
+        question_text = ""
 
         if is_ask:
             text, questions = format_ask_message(req)
-            # Build option buttons — one per option in the first question
-            option_buttons = []
             if questions:
-                for i, opt in enumerate(questions[0].get("options", [])):
-                    label = opt.get("label", f"Option {i+1}")
-                    option_buttons.append(
-                        [InlineKeyboardButton(
-                            f"{i+1}. {label}",
-                            callback_data=f"ans:{request_id}:{i}",
-                        )]
-                    )
-            option_buttons.append(
-                [InlineKeyboardButton("❌ Deny", callback_data=f"deny:{request_id}")]
-            )
-            keyboard = InlineKeyboardMarkup(option_buttons)
+                options = questions[0].get("options", [])
+                question_text = questions[0].get("question", "")
+            # Build option buttons — one per option in the first question
+            rows = []
+            for i, opt in enumerate(options):
+                label = opt.get("label", f"Option {i+1}")
+                rows.append([{
+                    "text": f"{i+1}. {label}",
+                    "callback_data": f"ans:{request_id}:{i}",
+                }])
+            rows.append([{"text": DENY_LABEL, "callback_data": f"deny:{request_id}"}])
         else:
             text = format_request_message(req)
-            buttons = [
-                InlineKeyboardButton("✅ Allow", callback_data=f"allow:{request_id}"),
-                InlineKeyboardButton("❌ Deny", callback_data=f"deny:{request_id}"),
-            ]
-            perm_suggestions = req.get("permission_suggestions", [])
-            rows = [buttons]
-            if perm_suggestions:
+            rows = [[
+                {"text": ALLOW_LABEL, "callback_data": f"allow:{request_id}"},
+                {"text": DENY_LABEL, "callback_data": f"deny:{request_id}"},
+            ]]
+            if req.get("permission_suggestions"):
                 rows.append([
-                    InlineKeyboardButton(
-                        "✅ Always Allow",
-                        callback_data=f"alwys:{request_id}",
-                    )
+                    {"text": ALWAYS_ALLOW_LABEL, "callback_data": f"alwys:{request_id}"},
                 ])
-            keyboard = InlineKeyboardMarkup(rows)
-
-        pending[request_id] = {
-            "event": event,
-            "decision": None,
-            "tg_message_id": None,
-            "tg_message_text": text,
-            "tool_name": tool_name,
-            "questions": questions,
-            "answer": None,
-            "permission_suggestions": req.get("permission_suggestions", []),
-        }
-
-        # Send to Telegram with retry
-        msg = None
-        for attempt in range(3):
-            try:
-                msg = await app.bot.send_message(
-                    chat_id=chat_id,
-                    text=text,
-                    reply_markup=keyboard,
-                )
-                break
-            except Exception as e:
-                log.warning("Request %s: send_message attempt %d failed: %s", request_id, attempt + 1, e)
-                if attempt < 2:
-                    await asyncio.sleep(1)
+        keyboard = {"inline_keyboard": rows}
+
+        # Only registration and sending take a slot — not the decision wait
+        async with send_slots:
+            # Checked inside the slot, with no await before registering, so
+            # two connections can't both claim the same id
+            if request_id in pending:
+                log.warning("Request %s is already pending — auto-denying duplicate", request_id)
+                write_frame(writer, DENY_RESPONSE)
+                await writer.drain()
+                return
+            entry = PendingEntry(
+                fut=fut,
+                tg_message_text=text,
+                tool_name=tool_name,
+                options=options,
+                question_text=question_text,
+                permission_suggestions=req.get("permission_suggestions", []),
+            )
+            pending[request_id] = entry
+            undecided[request_id] = None
+
+            # Send to Telegram with retry
+            msg = None
+            for attempt in range(3):
+                try:
+                    msg = await app.bot.send_message(
+                        chat_id=chat_id,
+                        text=text,
+                        reply_markup=keyboard,
+                    )
+                    break
+                except Exception as e:
+                    log.warning("Request %s: send_message attempt %d failed: %s", request_id, attempt + 1, e)
+                    if attempt < 2:
+                        await asyncio.sleep(1)
 
         if msg is None:
             log.error("Request %s: failed to send to Telegram — auto-denying", request_id)
             pending.pop(request_id, None)
-            response = json.dumps({"decision": "deny"}) + "\n"
-            writer.write(response.encode("utf-8"))
+            undecided.pop(request_id, None)
+            write_frame(writer, DENY_RESPONSE)
             await writer.drain()
             return
 
-        pending[request_id]["tg_message_id"] = msg.message_id
+        entry.tg_message_id = msg.message_id
 
         # Wait for user decision or timeout
         try:
-            await asyncio.wait_for(event.wait(), timeout=timeout)
-            decision = pending[request_id]["decision"] or "deny"
-        except asyncio.TimeoutError:
+            async with asyncio.timeout(timeout):
+                decision = await fut
+        except TimeoutError:
             decision = "deny"
             log.info("Request %s timed out — auto-denied", request_id)
-            try:
-                await app.bot.edit_message_reply_markup(
-                    chat_id=chat_id, message_id=msg.message_id,
-                    reply_markup=None,
-                )
-                await app.bot.edit_message_text(
-                    chat_id=chat_id, message_id=msg.message_id,
-                    text=text + "\n\n→ ⏰ Timed out — auto-denied",
-                )
-            except Exception:
-                pass
-
-        # Snapshot before cleanup
-        entry_snapshot = pending.get(request_id) or {}
+            edit_message_later(
+                app, chat_id, msg.message_id,
+                text + "\n\n→ ⏰ Timed out — auto-denied",
+            )
 
-        # Clean up
-        pending.pop(request_id, None)
+        # Clean up; only drop the registry slot if it is still ours
+        if pending.get(request_id) is entry:
+            del pending[request_id]
+            undecided.pop(request_id, None)
 
         # Send decision back to hook
         resp_data = {"decision": decision}
-        if entry_snapshot.get("answer") is not None:
-            resp_data["updatedInput"] = entry_snapshot["answer"]
-        if entry_snapshot.get("always_allow"):
-            perm_suggs = entry_snapshot.get("permission_suggestions", [])
-            if perm_suggs:
-                resp_data["updatedPermissions"] = perm_suggs
-        response = json.dumps(resp_data) + "\n"
-        writer.write(response.encode("utf-8"))
+        if entry.answer is not None:
+            resp_data["updatedInput"] = entry.answer
+        if entry.always_allow and entry.permission_suggestions:
+            resp_data["updatedPermissions"] = entry.permission_suggestions
+        if len(resp_data) > 1:
+            body = orjson.dumps(resp_data)
+        else:
+            body = ALLOW_RESPONSE if decision == "allow" else DENY_RESPONSE
+        write_frame(writer, body)
         await writer.drain()
         log.info("Request %s resolved: %s", request_id, decision)
 
@@ -532,19 +633,31 @@ async def handle_hook_connection(
             pass
 
 
-async def run_socket_server(app: Application, timeout: int):
+async def run_socket_server(app: Application, timeout: int, max_inflight: int):
     """Run the Unix domain socket server."""
     # Clean up stale socket
-    if os.path.exists(SOCKET_PATH):
+    with suppress(FileNotFoundError):
         os.unlink(SOCKET_PATH)
 
-    async def client_connected(reader, writer):
-        await handle_hook_connection(reader, writer, app, timeout)
+    # Cap concurrent Telegram sends so a flood of hooks can't outrun the rate limit
+    send_slots = asyncio.Semaphore(max_inflight)
 
-    server = await asyncio.start_unix_server(client_connected, path=SOCKET_PATH)
+    async def client_connected(reader, writer):
+        # Set per connection: on Linux accepted AF_UNIX sockets don't
+        # inherit the listener's buffer sizes
+        sock = writer.get_extra_info("socket")
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SOCKET_BUFFER_SIZE)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SOCKET_BUFFER_SIZE)
+        await handle_hook_connection(reader, writer, app, timeout, send_slots)
+
+    # A reader limit of MAX_REQUEST_SIZE lets a full request body buffer
+    # without the transport being paused and resumed along the way
+    server = await asyncio.start_unix_server(
+        client_connected, path=SOCKET_PATH, backlog=SOCKET_BACKLOG,
+        limit=MAX_REQUEST_SIZE,
+    )
     # Restrict socket permissions to owner only
     os.chmod(SOCKET_PATH, stat.S_IRUSR | stat.S_IWUSR)  # 0o600
-
     log.info("Unix socket server listening on %s", SOCKET_PATH)
 
     async with server:
@@ -556,6 +669,7 @@ async def run_socket_server(app: Application, timeout: int):
 # ---------------------------------------------------------------------------
 
 async def main():
+    global OWNER_CHAT_ID
     cfg = load_config()
     token = cfg.get("token")
     if not token:
@@ -563,6 +677,13 @@ async def main():
         sys.exit(1)
 
     timeout = cfg.get("timeout", DEFAULT_TIMEOUT)
+    max_inflight = cfg.get("max_inflight", DEFAULT_MAX_INFLIGHT)
+    if not isinstance(max_inflight, int) or max_inflight < 1:
+        log.error("max_inflight must be a positive integer, got %r", max_inflight)
+        sys.exit(1)
+    OWNER_CHAT_ID = cfg.get("chat_id")
+    if OWNER_CHAT_ID is not None:
+        owner_filter.add_chat_ids(OWNER_CHAT_ID)
 
     # Build the Telegram application (increased timeouts for parallel sessions)
     app = (
@@ -576,11 +697,16 @@ async def main():
     app.bot_data["config"] = cfg
 
     app.add_handler(CommandHandler("start", cmd_start))
-    app.add_handler(CommandHandler("status", cmd_status))
-    app.add_handler(CommandHandler("pause", cmd_pause))
-    app.add_handler(CommandHandler("resume", cmd_resume))
-    app.add_handler(CallbackQueryHandler(callback_handler))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
+    app.add_handler(CommandHandler("status", cmd_status, filters=owner_filter))
+    app.add_handler(CommandHandler("pause", cmd_pause, filters=owner_filter))
+    app.add_handler(CommandHandler("resume", cmd_resume, filters=owner_filter))
+    app.add_handler(CallbackQueryHandler(
+        callback_handler, pattern=r"^(allow|deny|alwys|ans):",
+    ))
+    app.add_handler(MessageHandler(
+        filters.TEXT & ~filters.COMMAND & owner_filter & filters.Regex(QUICK_REPLY_RE),
+        text_handler,
+    ))
 
     # Initialize the application (sets up the bot)
     await app.initialize()
@@ -592,7 +718,7 @@ async def main():
 
     # Run socket server (blocks until cancelled)
     try:
-        await run_socket_server(app, timeout)
+        await run_socket_server(app, timeout, max_inflight)
     except asyncio.CancelledError:
         pass
     finally:
@@ -601,14 +727,21 @@ async def main():
         await app.stop()
         await app.shutdown()
         # Clean up socket
-        if os.path.exists(SOCKET_PATH):
+        with suppress(FileNotFoundError):
             os.unlink(SOCKET_PATH)
 
 
 def main_sync():
     """Synchronous entry point for console_scripts."""
+    # uvloop is a faster drop-in event loop; not available on Windows
+    try:
+        import uvloop
+        run = uvloop.run
+    except ImportError:
+        run = asyncio.run
+
     try:
-        asyncio.run(main())
+        run(main())
     except KeyboardInterrupt:
         log.info("Interrupted — exiting")
 
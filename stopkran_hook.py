@@ -10,9 +10,9 @@ so Claude Code falls back to its normal interactive UI.
 """
 
 import json
+import os
 import socket
 import sys
-import uuid
 from pathlib import Path
 
 SOCKET_PATH = "/tmp/stopkran.sock"
@@ -20,6 +20,23 @@ PAUSED_FLAG = Path.home() / ".config" / "stopkran" / "paused"
 # Must be less than the hook timeout in settings.json (330s)
 RECV_TIMEOUT = 310
 
+# Fixed Claude Code outputs, pre-serialized (the hook runs once per process)
+ALLOW_OUTPUT = '{"hookSpecificOutput": {"hookEventName": "PermissionRequest", "decision": {"behavior": "allow"}}}'
+DENY_OUTPUT = '{"hookSpecificOutput": {"hookEventName": "PermissionRequest", "decision": {"behavior": "deny"}}}'
+
+
+def recv_exactly(sock: socket.socket, n: int) -> bytearray:
+    """Read exactly n bytes from the socket into a preallocated buffer."""
+    buf = bytearray(n)
+    view = memoryview(buf)
+    received = 0
+    while received < n:
+        count = sock.recv_into(view[received:])
+        if not count:
+            raise ConnectionError("daemon closed the connection")
+        received += count
+    return buf
+
 
 def main():
     # If paused, exit immediately — Claude Code falls back to native UI
@@ -37,7 +54,8 @@ def main():
     if event.get("hook_event_name") != "PermissionRequest":
         sys.exit(0)
 
-    request_id = str(uuid.uuid4())
+    # Short random id: it is embedded in every Telegram button's callback_data
+    request_id = os.urandom(6).hex()
 
     payload = json.dumps({
         "request_id": request_id,
@@ -53,20 +71,16 @@ def main():
         sock.settimeout(RECV_TIMEOUT)
         sock.connect(SOCKET_PATH)
 
-        sock.sendall((payload + "\n").encode("utf-8"))
+        # Length-prefixed framing: 4-byte big-endian size + JSON body
+        body = payload.encode("utf-8")
+        sock.sendall(len(body).to_bytes(4, "big") + body)
 
-        data = b""
-        while True:
-            chunk = sock.recv(4096)
-            if not chunk:
-                break
-            data += chunk
-            if b"\n" in data:
-                break
+        size = int.from_bytes(recv_exactly(sock, 4), "big")
+        data = recv_exactly(sock, size)
 
         sock.close()
 
-        response = json.loads(data.decode("utf-8").strip())
+        response = json.loads(data)
         decision = response.get("decision", "deny")
         updated_input = response.get("updatedInput")
         updated_permissions = response.get("updatedPermissions")
@@ -82,27 +96,24 @@ def main():
         sys.exit(0)
 
     # Output the decision in Claude Code hook format
-    if decision == "allow":
+    if decision != "allow":
+        output = DENY_OUTPUT
+    elif updated_input is None and updated_permissions is None:
+        output = ALLOW_OUTPUT
+    else:
         decision_obj = {"behavior": "allow"}
         if updated_input is not None:
             decision_obj["updatedInput"] = updated_input
         if updated_permissions is not None:
             decision_obj["updatedPermissions"] = updated_permissions
-        result = {
+        output = json.dumps({
             "hookSpecificOutput": {
                 "hookEventName": "PermissionRequest",
                 "decision": decision_obj,
             }
-        }
-    else:
-        result = {
-            "hookSpecificOutput": {
-                "hookEventName": "PermissionRequest",
-                "decision": {"behavior": "deny"},
-            }
-        }
+        })
 
-    print(json.dumps(result))
+    print(output)
     sys.stdout.flush()
 
 
@@ -11,6 +11,7 @@ Interactive script that:
 
 import json
 import os
+import stat
 import subprocess
 import sys
 from pathlib import Path
@@ -25,6 +26,27 @@ LAUNCHD_DIR = Path.home() / "Library" / "LaunchAgents"
 SCRIPT_DIR = Path(__file__).resolve().parent
 
 
+def write_json_atomic(path: Path, data: dict, indent: int, mode: int | None = None):
+    """Write JSON to a temp file and rename it over path.
+
+    A crash mid-write leaves the previous file intact instead of a truncated one.
+    Symlinks are followed, so the link itself is preserved. Without an explicit
+    mode the existing file's permissions are kept (0644 for a new file).
+    """
+    target = path.resolve()
+    if mode is None:
+        try:
+            mode = stat.S_IMODE(os.stat(target).st_mode)
+        except FileNotFoundError:
+            mode = 0o644
+    tmp = target.with_name(target.name + ".tmp")
+    fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, mode)
+    os.fchmod(fd, mode)  # also covers a leftover temp file and the umask
+    with open(fd, "w") as f:
+        json.dump(data, f, indent=indent)
+    os.replace(tmp, target)
+
+
 def ask(prompt: str, default: str = "") -> str:
     suffix = f" [{default}]" if default else ""
     value = input(f"{prompt}{suffix}: ").strip()
@@ -59,9 +81,7 @@ def step_config(token: str) -> dict:
         "chat_id": None,
         "timeout": timeout,
     }
-    with open(CONFIG_PATH, "w") as f:
-        json.dump(cfg, f, indent=4)
-    os.chmod(CONFIG_PATH, 0o600)
+    write_json_atomic(CONFIG_PATH, cfg, indent=4, mode=0o600)
     print(f"✅ Config saved to {CONFIG_PATH}")
     return cfg
 
@@ -112,8 +132,7 @@ def step_hook():
     perm_hooks.append(new_hook_entry)
 
     CLAUDE_SETTINGS_PATH.parent.mkdir(parents=True, exist_ok=True)
-    with open(CLAUDE_SETTINGS_PATH, "w") as f:
-        json.dump(settings, f, indent=2)
+    write_json_atomic(CLAUDE_SETTINGS_PATH, settings, indent=2)
 
     print(f"✅ Hook added to {CLAUDE_SETTINGS_PATH}")
 
@@ -163,10 +182,20 @@ def step_launchd():
     with open(plist_dest, "w") as f:
         f.write(content)
 
-    subprocess.run(
+    # Unload any previous instance; its output is ignored, and a busy
+    # daemon gets a few seconds to stop rather than stalling the wizard.
+    # A stuck unload is killed before loading, so it can't unload the new job.
+    unload = subprocess.Popen(
         ["launchctl", "unload", str(plist_dest)],
-        capture_output=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
     )
+    try:
+        unload.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        print("⚠️  launchctl unload timed out — stopping it before loading.")
+        unload.kill()
+        unload.wait()
     result = subprocess.run(
         ["launchctl", "load", str(plist_dest)],
         capture_output=True,